@@ -0,0 +1,113 @@
+/*
+ * bspatch.c - Optional native bsdiff patch applier for sc2knet_patcher.py
+ *
+ * C port of bsdiff_apply() in sc2knet_patcher.py. When the shared library
+ * is built next to sc2knet_patcher.py it is loaded through ctypes and used
+ * automatically; otherwise the pure Python implementation is used.
+ *
+ * Build:
+ *   Linux/macOS:  cc -O2 -shared -fPIC -o src/_bspatch.so src/bspatch.c
+ *   Windows:      cl /O2 /LD src\bspatch.c /Fe:src\_bspatch.dll
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+/* Return codes for bspatch_apply() */
+#define BSPATCH_OK        0
+#define BSPATCH_BAD_CTRL -1   /* triples run past new_size or extra */
+
+/*
+ * dst[i] += val[i] for i < n, eight bytes at a time (SWAR): the low seven
+ * bits of each byte are summed without carrying into the next byte, then
+ * the top bit is fixed up with XOR.
+ */
+static void add_run(unsigned char *dst, const unsigned char *val, size_t n)
+{
+    const uint64_t high = 0x8080808080808080ULL;
+    uint64_t a, b, r;
+    size_t i = 0;
+
+    for (; i + 8 <= n; i += 8) {
+        memcpy(&a, dst + i, 8);
+        memcpy(&b, val + i, 8);
+        r = ((a & ~high) + (b & ~high)) ^ ((a ^ b) & high);
+        memcpy(dst + i, &r, 8);
+    }
+    for (; i < n; i++)
+        dst[i] += val[i];
+}
+
+/*
+ * Apply a patch to old (oldsize bytes) into out (newsize bytes, zeroed by
+ * the caller).
+ *
+ * ctrl holds ntriples (add_len, copy_len, seek_offset) triples. pos/val are
+ * the sorted diff-stream positions and delta bytes of the non-zero diff
+ * entries (ndeltas of them). Old positions outside the old file read as 0.
+ */
+EXPORT int bspatch_apply(const unsigned char *old, size_t oldsize,
+                         unsigned char *out, size_t newsize,
+                         const int64_t *ctrl, size_t ntriples,
+                         const int64_t *pos, const unsigned char *val,
+                         size_t ndeltas,
+                         const unsigned char *extra, size_t extrasize)
+{
+    int64_t oldpos = 0, lo, hi, end;
+    size_t newpos = 0, diffpos = 0, extrapos = 0, d = 0, run, t;
+    int64_t add, copy;
+
+    for (t = 0; t < ntriples; t++) {
+        add = ctrl[3 * t];
+        copy = ctrl[3 * t + 1];
+
+        if (add < 0 || copy < 0 || (size_t)add > newsize - newpos)
+            return BSPATCH_BAD_CTRL;
+
+        /* Step 1: old bytes (the in-range part; the rest stays zero) */
+        lo = oldpos < 0 ? 0 : oldpos;
+        hi = oldpos + add;
+        if (hi > (int64_t)oldsize)
+            hi = (int64_t)oldsize;
+        if (hi > lo)
+            memcpy(out + newpos + (lo - oldpos), old + lo, (size_t)(hi - lo));
+
+        /* ... plus the diff deltas that fall in this block, a run of
+         * consecutive positions at a time */
+        end = (int64_t)(diffpos + add);
+        while (d < ndeltas && pos[d] < end) {
+            if (pos[d] < (int64_t)diffpos) {
+                d++;
+                continue;
+            }
+            for (run = 1; d + run < ndeltas && pos[d + run] < end
+                          && pos[d + run] == pos[d] + (int64_t)run; run++)
+                ;
+            add_run(out + newpos + (pos[d] - diffpos), val + d, run);
+            d += run;
+        }
+
+        diffpos += add;
+        newpos += add;
+        oldpos += add;
+
+        /* Step 2: inserted bytes from the extra block */
+        if ((size_t)copy > newsize - newpos || (size_t)copy > extrasize - extrapos)
+            return BSPATCH_BAD_CTRL;
+        memcpy(out + newpos, extra + extrapos, (size_t)copy);
+        extrapos += copy;
+        newpos += copy;
+
+        /* Step 3: seek */
+        oldpos += ctrl[3 * t + 2];
+    }
+
+    return BSPATCH_OK;
+}
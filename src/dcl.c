@@ -0,0 +1,196 @@
+/*
+ * dcl.c - Optional native DCL IMPLODE decompressor for is3extract.py
+ *
+ * C port of the same blast.c algorithm (Mark Adler) that is3extract.py
+ * implements in pure Python. When the shared library is built next to
+ * is3extract.py it is loaded through ctypes and used automatically;
+ * otherwise the pure Python decoder is used.
+ *
+ * Build:
+ *   Linux/macOS:  cc -O2 -shared -fPIC -o src/_dcl.so src/dcl.c
+ *   Windows:      cl /O2 /LD src\dcl.c /Fe:src\_dcl.dll
+ */
+
+#include <setjmp.h>
+#include <stddef.h>
+#include <stdint.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+#define MAXBITS 13
+
+/* Return codes for dcl_decompress() */
+#define DCL_OK          0
+#define DCL_FULL        1   /* output buffer too small, retry with more */
+#define DCL_BAD_HEADER -1
+#define DCL_EOF        -2   /* ran out of input */
+#define DCL_BAD_DIST   -3   /* distance too far back */
+#define DCL_BAD_CODE   -4   /* invalid Huffman code */
+
+/* Huffman code tables (compressed representation, see is3extract.py) */
+static const unsigned char LITLEN[] = {
+    11, 124, 8, 7, 28, 7, 188, 13, 76, 4, 10, 8, 12, 10, 12, 10, 8, 23, 8,
+    9, 7, 6, 7, 8, 7, 6, 55, 8, 23, 24, 12, 11, 7, 9, 11, 12, 6, 7, 22, 5,
+    7, 24, 6, 11, 9, 6, 7, 22, 7, 11, 38, 7, 9, 8, 25, 11, 8, 11, 9, 12,
+    8, 12, 5, 38, 5, 38, 5, 11, 7, 5, 6, 21, 6, 10, 53, 8, 7, 24, 10, 27,
+    44, 253, 253, 253, 252, 252, 252, 13, 12, 45, 12, 45, 12, 61, 12, 45,
+    44, 173
+};
+static const unsigned char LENLEN[] = {2, 35, 36, 53, 38, 23};
+static const unsigned char DISTLEN[] = {2, 20, 53, 230, 247, 151, 248};
+
+static const uint16_t BASE[16] = {
+    3, 2, 4, 5, 6, 7, 8, 9, 10, 12, 16, 24, 40, 72, 136, 264
+};
+static const uint8_t EXTRA[16] = {
+    0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8
+};
+
+struct huffman {
+    uint16_t count[MAXBITS + 1];
+    uint16_t symbol[256];
+};
+
+struct state {
+    const unsigned char *in;
+    size_t left;
+    uint64_t bitbuf;
+    int bitcnt;
+    jmp_buf env;
+};
+
+static unsigned bits(struct state *s, int need)
+{
+    unsigned val;
+
+    while (s->bitcnt < need) {
+        if (s->left == 0)
+            longjmp(s->env, 1);
+        s->bitbuf |= (uint64_t)*s->in++ << s->bitcnt;
+        s->left--;
+        s->bitcnt += 8;
+    }
+    val = (unsigned)(s->bitbuf & ((1u << need) - 1));
+    s->bitbuf >>= need;
+    s->bitcnt -= need;
+    return val;
+}
+
+static int decode(struct state *s, const struct huffman *h)
+{
+    int len, code = 0, first = 0, index = 0, count;
+
+    for (len = 1; len <= MAXBITS; len++) {
+        code |= bits(s, 1) ^ 1;     /* codes are stored bit-inverted */
+        count = h->count[len];
+        if (code < first + count)
+            return h->symbol[index + (code - first)];
+        index += count;
+        first = (first + count) << 1;
+        code <<= 1;
+    }
+    return -1;
+}
+
+static void construct(struct huffman *h, const unsigned char *rep, int n)
+{
+    uint8_t lengths[256];
+    uint16_t offs[MAXBITS + 1];
+    int sym = 0, i, len;
+
+    while (n--) {
+        len = *rep & 15;
+        for (i = (*rep++ >> 4) + 1; i > 0; i--)
+            lengths[sym++] = (uint8_t)len;
+    }
+
+    for (len = 0; len <= MAXBITS; len++)
+        h->count[len] = 0;
+    for (i = 0; i < sym; i++)
+        h->count[lengths[i]]++;
+
+    offs[1] = 0;
+    for (len = 1; len < MAXBITS; len++)
+        offs[len + 1] = offs[len] + h->count[len];
+
+    for (i = 0; i < sym; i++)
+        if (lengths[i] != 0)
+            h->symbol[offs[lengths[i]]++] = (uint16_t)i;
+}
+
+/*
+ * Decompress inlen bytes of DCL IMPLODE data into out (capacity outcap).
+ * On DCL_OK, *outlen holds the number of bytes produced.
+ */
+EXPORT int dcl_decompress(const unsigned char *in, size_t inlen,
+                          unsigned char *out, size_t outcap, size_t *outlen)
+{
+    struct huffman litcode, lencode, distcode;
+    struct state s;
+    size_t pos = 0;
+    unsigned lit, dict_bits, dist, len, extra;
+    int symbol;
+
+    construct(&litcode, LITLEN, sizeof(LITLEN));
+    construct(&lencode, LENLEN, sizeof(LENLEN));
+    construct(&distcode, DISTLEN, sizeof(DISTLEN));
+
+    s.in = in;
+    s.left = inlen;
+    s.bitbuf = 0;
+    s.bitcnt = 0;
+    if (setjmp(s.env) != 0)
+        return DCL_EOF;
+
+    lit = bits(&s, 8);
+    dict_bits = bits(&s, 8);
+    if (lit > 1 || dict_bits < 4 || dict_bits > 6)
+        return DCL_BAD_HEADER;
+
+    for (;;) {
+        if (bits(&s, 1)) {
+            /* Length/distance pair */
+            symbol = decode(&s, &lencode);
+            if (symbol < 0)
+                return DCL_BAD_CODE;
+            len = BASE[symbol] + bits(&s, EXTRA[symbol]);
+            if (len == 519)
+                break;
+
+            extra = len == 2 ? 2 : dict_bits;
+            symbol = decode(&s, &distcode);
+            if (symbol < 0)
+                return DCL_BAD_CODE;
+            dist = ((unsigned)symbol << extra) + bits(&s, extra) + 1;
+            if (dist > pos)
+                return DCL_BAD_DIST;
+            if (outcap - pos < len)
+                return DCL_FULL;
+
+            /* Byte-wise so overlapping copies repeat the pattern */
+            while (len--) {
+                out[pos] = out[pos - dist];
+                pos++;
+            }
+        } else {
+            /* Literal byte */
+            if (lit) {
+                symbol = decode(&s, &litcode);
+                if (symbol < 0)
+                    return DCL_BAD_CODE;
+            } else {
+                symbol = (int)bits(&s, 8);
+            }
+            if (pos == outcap)
+                return DCL_FULL;
+            out[pos++] = (unsigned char)symbol;
+        }
+    }
+
+    *outlen = pos;
+    return DCL_OK;
+}
@@ -6,6 +6,8 @@ Extracts files from InstallShield 3.x self-extracting installers and Z archives.
 Handles multiple embedded archives automatically.
 
 No external dependencies - includes pure Python DCL IMPLODE decompressor.
+If the optional native decoder (dcl.c) has been compiled to _dcl.so /
+_dcl.dll next to this script, it is used automatically for speed.
 
 Usage:
   python3 is3extract.py <installer.exe> <output_folder>
@@ -23,10 +25,25 @@ Based on:
 import sys
 import os
 import struct
+import ctypes
+import hashlib
+import mmap
+from array import array
 
 # InstallShield 3.x signature
 IS3_SIGNATURE = b'\x13\x5d\x65\x8c'
 
+# Archive header fields: file_count @0x0C, archive_len @0x12,
+# name_offset @0x29, dir_count @0x31 (header is 0x33 bytes)
+_IS3_HEADER = struct.Struct('<12xH4xL19xL4xH')
+
+# Directory entry: file_count, block_len, name_len (name follows)
+_DIR_ENTRY = struct.Struct('<HHH')
+
+# File entry: comp_len @0x07, date @0x0F, time @0x11, block_len @0x17,
+# name_len @0x1D (name follows at 0x1E)
+_FILE_ENTRY = struct.Struct('<7xL4xHH4xH4xB')
+
 # =============================================================================
 # DCL IMPLODE Decompressor (Pure Python port of blast.c by Mark Adler)
 # =============================================================================
@@ -57,6 +74,12 @@ BASE = [3, 2, 4, 5, 6, 7, 8, 9, 10, 12, 16, 24, 40, 72, 136, 264]
 # Extra bits for length codes
 EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8]
 
+# (base, extra bits) per length symbol, fused for a single index
+BASE_EXTRA = tuple(zip(BASE, EXTRA))
+
+# Low-bit masks indexed by bit count
+MASK = [(1 << i) - 1 for i in range(33)]
+
 
 class BitReader:
     """Bit-level reader for compressed data."""
@@ -67,21 +90,73 @@ class BitReader:
         self.bitbuf = 0
         self.bitcnt = 0
 
+    def _refill(self):
+        """Top the bit buffer up to 57-64 bits with one read of up to 8 bytes."""
+        take = (64 - self.bitcnt) >> 3
+        chunk = self.data[self.pos:self.pos + take]
+
+        self.bitbuf |= int.from_bytes(chunk, 'little') << self.bitcnt
+        self.pos += len(chunk)
+        self.bitcnt += len(chunk) << 3
+
     def bits(self, need):
         """Read 'need' bits from input."""
-        val = self.bitbuf
-
-        while self.bitcnt < need:
-            if self.pos >= len(self.data):
+        if self.bitcnt < need:
+            self._refill()
+            if self.bitcnt < need:
                 raise ValueError("Unexpected end of input")
-            val |= self.data[self.pos] << self.bitcnt
-            self.pos += 1
-            self.bitcnt += 8
 
-        self.bitbuf = val >> need
+        val = self.bitbuf & MASK[need]
+        self.bitbuf >>= need
         self.bitcnt -= need
 
-        return val & ((1 << need) - 1)
+        return val
+
+    def peek(self, need):
+        """
+        Buffer at least 'need' bits (fewer at end of input) and return the
+        raw bit buffer without consuming anything. Callers mask the result.
+        """
+        if self.bitcnt < need:
+            self._refill()
+
+        return self.bitbuf
+
+    def literal_run(self):
+        """
+        Consume a run of uncoded literals (a 0 flag bit followed by 8 raw
+        bits each) and return their bytes. Stops in front of the next
+        length/distance flag, or when fewer than 9 bits are left.
+        """
+        run = bytearray()
+
+        while True:
+            if self.bitcnt < 9:
+                self._refill()
+                if self.bitcnt < 9:
+                    return run
+
+            # Peel off every whole literal already in the buffer
+            buf = self.bitbuf
+            cnt = self.bitcnt
+            taken = 0
+            while cnt - taken >= 9 and not (buf >> taken) & 1:
+                run.append((buf >> (taken + 1)) & 0xFF)
+                taken += 9
+
+            self.bitbuf = buf >> taken
+            self.bitcnt = cnt - taken
+
+            if self.bitcnt and self.bitbuf & 1:
+                return run
+
+    def skip(self, n):
+        """Discard 'n' bits previously buffered by peek()."""
+        if n > self.bitcnt:
+            raise ValueError("Unexpected end of input")
+
+        self.bitbuf >>= n
+        self.bitcnt -= n
 
 
 class HuffmanTable:
@@ -117,41 +192,168 @@ class HuffmanTable:
                 self.symbol[offs[length]] = sym
                 offs[length] += 1
 
-    def decode(self, reader):
-        """Decode one symbol from the bit stream."""
-        code = 0
-        first = 0
-        index = 0
+        self._build_lut()
 
-        for length in range(1, MAXBITS + 1):
-            code |= reader.bits(1) ^ 1  # Invert bit
-            count = self.count[length]
+    def _build_lut(self):
+        """
+        Build a single-lookup decode table keyed by the next maxlen bits.
 
-            if code < first + count:
-                return self.symbol[index + (code - first)]
+        Codes are stored bit-inverted and read first bit first, so each
+        code is reversed into stream order once here. Every slot holds
+        (length << 9) | symbol; unused slots stay 0 (invalid code).
+        """
+        self.maxlen = max(l for l in range(1, MAXBITS + 1) if self.count[l])
+        self.mask = (1 << self.maxlen) - 1
+        self.lut = array('H', bytes(2 << self.maxlen))
 
+        first = 0
+        index = 0
+        for length in range(1, self.maxlen + 1):
+            count = self.count[length]
+            for i in range(count):
+                code = first + i
+                # Invert and reverse the code into LSB-first stream order
+                stream = 0
+                for bit in range(length):
+                    stream |= (((code >> (length - 1 - bit)) & 1) ^ 1) << bit
+                entry = (length << 9) | self.symbol[index + i]
+                for high in range(0, 1 << self.maxlen, 1 << length):
+                    self.lut[high | stream] = entry
             index += count
             first = (first + count) << 1
-            code <<= 1
 
-        raise ValueError("Invalid Huffman code")
+    def decode(self, reader):
+        """Decode one symbol from the bit stream."""
+        entry = self.lut[reader.peek(self.maxlen) & self.mask]
+        length = entry >> 9
+
+        if not length:
+            raise ValueError("Invalid Huffman code")
+
+        reader.skip(length)
+        return entry & 0x1FF
+
+
+# (litcode, lencode, distcode), built on first use. The code lengths are
+# fixed by the format, so every member of every archive shares them.
+_HUFFMAN_TABLES = None
+
+
+def _huffman_tables():
+    """Return the three DCL Huffman tables, building them once per process."""
+    global _HUFFMAN_TABLES
+
+    if _HUFFMAN_TABLES is None:
+        _HUFFMAN_TABLES = (HuffmanTable(LITLEN), HuffmanTable(LENLEN), HuffmanTable(DISTLEN))
+
+    return _HUFFMAN_TABLES
+
+
+def _load_native_dcl():
+    """Load the compiled decoder from dcl.c if present, else return None."""
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    for name in ('_dcl.so', '_dcl.dll', '_dcl.dylib'):
+        path = os.path.join(here, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            lib = ctypes.CDLL(path)
+            func = lib.dcl_decompress
+        except (OSError, AttributeError):
+            # Not loadable, or built without the exported symbol
+            return None
+        func.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_void_p,
+                         ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+        func.restype = ctypes.c_int
+        return func
+
+    return None
+
+
+_native_dcl = _load_native_dcl()
+
+# dcl_decompress() return code asking for a larger output buffer
+DCL_FULL = 1
+
+# Initial size of the output buffer extract_archive() shares across members
+EXTRACT_BUFFER_SIZE = 2 << 20
+
+# Typical upper bound of DCL output size over compressed size, used to
+# reserve output space before decoding (the buffer still grows if needed)
+DCL_EXPANSION_HINT = 8
+
+
+def _grow(output, need):
+    """Grow output (at least doubling) so it holds at least 'need' bytes."""
+    output.extend(bytes(max(need - len(output), len(output), MAXWIN)))
+
+
+def _decompress_dcl_native(data, output):
+    """Decode via the native decoder into output. Returns the size, or None."""
+    data = bytes(data)
+    out_len = ctypes.c_size_t(0)
+
+    if not output:
+        _grow(output, MAXWIN)
+
+    while True:
+        capacity = len(output)
+        out = (ctypes.c_char * capacity).from_buffer(output)
+        ret = _native_dcl(data, len(data), out, capacity, ctypes.byref(out_len))
+        del out  # release the buffer export so output can be resized
+
+        if ret == DCL_FULL:
+            _grow(output, capacity * 2)
+            continue
+        if ret != 0:
+            return None
+        return out_len.value
 
 
-def decompress_dcl(data):
+def decompress_dcl(data, output=None, max_out=None):
     """
     Decompress PKWare DCL IMPLODE data.
 
+    Uses the native decoder when available, otherwise pure Python.
     Returns decompressed bytes, or None on error.
+
+    If a bytearray is passed as output, the data is decoded into it from
+    offset 0 instead (growing it when needed) and the number of bytes
+    produced is returned. Reusing one buffer across an archive avoids an
+    allocation and a copy per member.
+
+    max_out is an optional expected output size used to reserve the
+    buffer up front so it does not have to grow while decoding.
     """
+    if output is None:
+        buffer = bytearray(max_out or max(len(data) * 4, MAXWIN))
+    else:
+        buffer = output
+        if max_out and len(buffer) < max_out:
+            _grow(buffer, max_out)
+
+    if _native_dcl is not None:
+        size = _decompress_dcl_native(data, buffer)
+    else:
+        size = _decompress_dcl_py(data, buffer)
+
+    if output is not None or size is None:
+        return size
+
+    del buffer[size:]
+    return bytes(buffer)
+
+
+def _decompress_dcl_py(data, output):
+    """Pure Python DCL decoder into output. Returns the size, or None."""
     if len(data) < 2:
         return None
 
     try:
         reader = BitReader(data)
-        output = bytearray()
-        window = bytearray(MAXWIN)
-        window_pos = 0
-        first = True
+        out_pos = 0
+        out_size = len(output)
 
         # Read header
         lit = reader.bits(8)  # 0 = uncoded literals, 1 = coded
@@ -162,57 +364,75 @@ def decompress_dcl(data):
         if dict_bits < 4 or dict_bits > 6:
             return None
 
-        # Build Huffman tables
-        litcode = HuffmanTable(LITLEN) if lit else None
-        lencode = HuffmanTable(LENLEN)
-        distcode = HuffmanTable(DISTLEN)
+        litcode, lencode, distcode = _huffman_tables()
+
+        # Bind hot-loop names locally to skip global/attribute lookups
+        bits = reader.bits
+        decode_len = lencode.decode
+        decode_dist = distcode.decode
+        decode_lit = litcode.decode if lit else None
+        base_extra = BASE_EXTRA
+
+        literal_run = reader.literal_run
 
         # Decompress
         while True:
-            if reader.bits(1):  # Length/distance pair
+            if not lit:
+                # Uncoded literals: copy the whole run in one slice
+                run = literal_run()
+                if run:
+                    end_pos = out_pos + len(run)
+                    if end_pos > out_size:
+                        _grow(output, end_pos)
+                        out_size = len(output)
+                    output[out_pos:end_pos] = run
+                    out_pos = end_pos
+
+            if bits(1):  # Length/distance pair
                 # Get length
-                symbol = lencode.decode(reader)
-                length = BASE[symbol] + reader.bits(EXTRA[symbol])
+                base, extra = base_extra[decode_len(reader)]
+                length = base + bits(extra)
 
                 if length == 519:  # End code
                     break
 
                 # Get distance
                 dist_extra = 2 if length == 2 else dict_bits
-                dist = distcode.decode(reader) << dist_extra
-                dist += reader.bits(dist_extra)
+                dist = decode_dist(reader) << dist_extra
+                dist += bits(dist_extra)
                 dist += 1
 
-                if first and dist > window_pos:
+                # Matches only reach back into output already produced, so
+                # the output itself serves as the sliding window
+                if dist > out_pos:
                     return None  # Distance too far back
 
-                # Copy from window
-                for _ in range(length):
-                    # Handle wrap-around in window
-                    src_pos = (window_pos - dist) % MAXWIN
-                    byte = window[src_pos]
-
-                    output.append(byte)
-                    window[window_pos] = byte
-                    window_pos = (window_pos + 1) % MAXWIN
+                end_pos = out_pos + length
+                if end_pos > out_size:
+                    _grow(output, end_pos)
+                    out_size = len(output)
 
-                    if window_pos == 0:
-                        first = False
+                src_pos = out_pos - dist
+                if dist >= length:
+                    output[out_pos:end_pos] = output[src_pos:src_pos + length]
+                else:
+                    # Overlapping match: repeat the last 'dist' bytes
+                    output[out_pos:end_pos] = (output[src_pos:out_pos] * (length // dist + 1))[:length]
+                out_pos = end_pos
             else:
                 # Literal byte
                 if lit:
-                    symbol = litcode.decode(reader)
+                    symbol = decode_lit(reader)
                 else:
-                    symbol = reader.bits(8)
+                    symbol = bits(8)
 
-                output.append(symbol)
-                window[window_pos] = symbol
-                window_pos = (window_pos + 1) % MAXWIN
+                if out_pos == out_size:
+                    _grow(output, out_pos + 1)
+                    out_size = len(output)
+                output[out_pos] = symbol
+                out_pos += 1
 
-                if window_pos == 0:
-                    first = False
-
-        return bytes(output)
+        return out_pos
 
     except (ValueError, IndexError) as e:
         return None
@@ -232,11 +452,8 @@ def find_is3_archives(data):
         if pos == -1:
             break
 
-        if pos + 0x33 <= len(data):
-            file_count = struct.unpack('<H', data[pos + 0x0C:pos + 0x0E])[0]
-            archive_len = struct.unpack('<L', data[pos + 0x12:pos + 0x16])[0]
-            name_offset = struct.unpack('<L', data[pos + 0x29:pos + 0x2D])[0]
-            dir_count = struct.unpack('<H', data[pos + 0x31:pos + 0x33])[0]
+        if pos + _IS3_HEADER.size <= len(data):
+            file_count, archive_len, name_offset, dir_count = _IS3_HEADER.unpack_from(data, pos)
 
             archives.append({
                 'offset': pos,
@@ -264,11 +481,9 @@ def parse_file_table(data, archive_info):
     # Parse directory entries - each has a count of files that belong to it
     directories = []
     for i in range(dir_count):
-        if pos + 6 > len(data):
+        if pos + _DIR_ENTRY.size > len(data):
             break
-        dir_file_count = struct.unpack('<H', data[pos:pos+2])[0]
-        block_len = struct.unpack('<H', data[pos+2:pos+4])[0]
-        name_len = struct.unpack('<H', data[pos+4:pos+6])[0]
+        dir_file_count, block_len, name_len = _DIR_ENTRY.unpack_from(data, pos)
         dir_name = data[pos+6:pos+6+name_len].decode('ascii', errors='ignore').rstrip('\x00')
         directories.append({'name': dir_name, 'file_count': dir_file_count})
         pos += block_len
@@ -284,14 +499,10 @@ def parse_file_table(data, archive_info):
             dir_for_file.append(dir_path)
 
     for i in range(file_count):
-        if pos + 0x1E > len(data):
+        if pos + _FILE_ENTRY.size > len(data):
             break
 
-        comp_len = struct.unpack('<L', data[pos+0x07:pos+0x0B])[0]
-        file_date = struct.unpack('<H', data[pos+0x0F:pos+0x11])[0]
-        file_time = struct.unpack('<H', data[pos+0x11:pos+0x13])[0]
-        block_len = struct.unpack('<H', data[pos+0x17:pos+0x19])[0]
-        name_len = data[pos+0x1D]
+        comp_len, file_date, file_time, block_len, name_len = _FILE_ENTRY.unpack_from(data, pos)
         filename = data[pos+0x1E:pos+0x1E+name_len].decode('ascii', errors='ignore')
 
         # Get directory for this file
@@ -318,24 +529,34 @@ def parse_file_table(data, archive_info):
     return files, directories
 
 
-def extract_archive(data, archive_info, output_dir, prefix=''):
-    """Extract all files from an IS3 archive."""
+def extract_archive(data, archive_info, output_dir, prefix='', hashes=None):
+    """
+    Extract all files from an IS3 archive.
+
+    If a dict is passed as hashes, it is filled with the MD5 hex digest of
+    each extracted file, keyed by its '/'-separated archive path.
+    """
     files, directories = parse_file_table(data, archive_info)
 
     os.makedirs(output_dir, exist_ok=True)
+    created_dirs = {''}
 
     extracted = 0
     failed = 0
 
+    # One output buffer reused (and grown as needed) for every member
+    buffer = bytearray(EXTRACT_BUFFER_SIZE)
+
     for f in files:
         name = f['name'].replace('\\', '/')
         offset = f['compressed_offset']
         size = f['compressed_size']
 
-        # Create subdirectories if needed
-        if '/' in name:
-            subdir = os.path.dirname(name)
+        # Create subdirectories if needed, once per directory
+        subdir = os.path.dirname(name)
+        if subdir not in created_dirs:
             os.makedirs(os.path.join(output_dir, subdir), exist_ok=True)
+            created_dirs.add(subdir)
 
         print(f"  {prefix}{name}", end='', flush=True)
 
@@ -343,13 +564,18 @@ def extract_archive(data, archive_info, output_dir, prefix=''):
         comp_data = data[offset:offset + size]
 
         # Decompress
-        decompressed = decompress_dcl(comp_data)
-
-        if decompressed:
-            outpath = os.path.join(output_dir, name)
-            with open(outpath, 'wb') as out:
-                out.write(decompressed)
-            print(f" -> {len(decompressed):,} bytes")
+        out_size = decompress_dcl(comp_data, buffer, max_out=max(16384, size * DCL_EXPANSION_HINT))
+
+        if out_size:
+            with memoryview(buffer)[:out_size] as decompressed:
+                if hashes is not None:
+                    # A checksum only; FIPS builds refuse a plain md5()
+                    hashes[name] = hashlib.md5(
+                        decompressed, usedforsecurity=False).hexdigest()
+                outpath = os.path.join(output_dir, name)
+                with open(outpath, 'wb') as out:
+                    out.write(decompressed)
+            print(f" -> {out_size:,} bytes")
             extracted += 1
         else:
             print(" -> FAILED")
@@ -379,8 +605,10 @@ def main():
         print(f"ERROR: File not found: {input_file}")
         sys.exit(1)
 
+    # Map the installer read-only instead of reading it into memory; the
+    # mapping stays valid after the file is closed
     with open(input_file, 'rb') as f:
-        data = f.read()
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
     print(f"Input: {input_file} ({len(data):,} bytes)")
 
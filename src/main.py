@@ -1,15 +1,22 @@
 import hashlib
-import requests
+import http.client
+import mmap
 import sys
+import time
 import pycdlib
 import is3extract
 import os
 import shutil
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.error import URLError
 from urllib.parse import urlparse, unquote
+from urllib.request import urlopen
 import sc2knet_patcher
 
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 def handle_dplay_dependency(path):
     """
     Checks for dplayx.dll based on OS and manages its migration to FILES_DIR.
@@ -58,11 +65,13 @@ def get_project_paths():
 
 def calculate_md5(file_path):
     """Helper to handle the heavy lifting of hashing."""
-    md5_hash = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5_hash.update(chunk)
-    return md5_hash.hexdigest()
+    # file_digest runs the read/update loop in C with a large buffer.
+    # Unbuffered open lets it readinto() straight from the OS.
+    # MD5 is only a file checksum here, hence usedforsecurity=False (as in
+    # sc2knet_patcher), which FIPS-restricted OpenSSL builds require
+    with open(file_path, "rb", buffering=0) as f:
+        return hashlib.file_digest(
+            f, lambda: hashlib.md5(usedforsecurity=False)).hexdigest()
 
 def map_directory_hashes(directory_path, ignore_file):
     """Pure function: takes a path and returns a map of hashes."""
@@ -71,10 +80,15 @@ def map_directory_hashes(directory_path, ignore_file):
     if not directory_path.exists():
         return hash_map
 
-    for file_path in directory_path.iterdir():
-        if file_path.is_file() and file_path.name != ignore_file:
-            # We could move the actual hashing to its own helper too
-            file_hash = calculate_md5(file_path)
+    files = [
+        file_path for file_path in directory_path.iterdir()
+        if file_path.is_file() and file_path.name != ignore_file
+    ]
+
+    # hashlib releases the GIL while hashing, so the ISO and updater can be
+    # read and hashed at the same time
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+        for file_path, file_hash in zip(files, pool.map(calculate_md5, files)):
             hash_map[file_hash] = file_path.name
 
     return hash_map
@@ -124,6 +138,34 @@ def file_checks(current_files, expected_hashes):
     # if all checks pass, return True
     return True
 
+class DownloadProgress:
+    """
+    Write-through file wrapper that counts bytes and prints a live MB
+    counter, at most once every `interval` seconds.
+    """
+
+    def __init__(self, file, interval=0.25):
+        self.file = file
+        self.interval = interval
+        self.total = 0
+        self.last_print = 0.0
+
+    def write(self, chunk):
+        written = self.file.write(chunk)
+        self.total += len(chunk)
+
+        now = time.monotonic()
+        if now - self.last_print >= self.interval:
+            self.last_print = now
+            self.show()
+
+        return written
+
+    def show(self):
+        # \r keeps the output on a single line
+        print(f"\rProgress: {self.total / (1024*1024):.2f} MB downloaded", end="")
+
+
 def download_binary_file(url, folder_path):
     """
     Downloads binary files, sanitizes URL encoding (like %20),
@@ -142,27 +184,28 @@ def download_binary_file(url, folder_path):
         path = Path(folder_path) / filename
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        # 3. Stream the download to keep memory usage low
-        with requests.get(url, stream=True) as response:
-            response.raise_for_status()
-
-            total_dl = 0
-            with path.open('wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        file.write(chunk)
-                        total_dl += len(chunk)
-                        # \r keeps the output on a single line
-                        print(f"\rProgress: {total_dl / (1024*1024):.2f} MB downloaded", end="")
+        # 3. Stream the download in 1 MiB blocks; the copy loop runs in C
+        #    and progress is only printed a few times per second
+        with urlopen(url) as response, path.open('wb') as file:
+            progress = DownloadProgress(file)
+            shutil.copyfileobj(response, progress, length=DOWNLOAD_CHUNK_SIZE)
+            progress.show()
 
-            print(f"\nSuccessfully saved to: {path.absolute()}")
-            return True
+        print(f"\nSuccessfully saved to: {path.absolute()}")
+        return True
 
-    except requests.exceptions.RequestException as e:
+    # http.client errors (e.g. IncompleteRead when the connection drops
+    # mid-body) are not OSErrors, so name them too
+    except (URLError, OSError, http.client.HTTPException) as e:
         print(f"\nDownload failed: {e}")
         return False
 
 
+# pycdlib copies 8 KiB per read/write by default; larger blocks keep the
+# ISO extraction close to raw disk speed
+ISO_COPY_BLOCKSIZE = 1 << 20
+
+
 def extract_iso_recursive(iso_path, iso_internal_folder, local_dest_root):
     """
     Extract directory on ISO and its contents, including subdirs
@@ -179,12 +222,13 @@ def extract_iso_recursive(iso_path, iso_internal_folder, local_dest_root):
 
         for child in iso.list_children(iso_path=current_iso_dir):
             # Skip ISO 9660 dot entries
-            name = child.file_identifier().decode('utf-8').split(';')[0]
+            identifier = child.file_identifier().decode('utf-8')
+            name = identifier.split(';')[0]
             if name in ['.', '..']:
                 continue
 
             # Full paths for ISO and Local
-            child_iso_path = f"{current_iso_dir}/{child.file_identifier().decode('utf-8')}"
+            child_iso_path = f"{current_iso_dir}/{identifier}"
             child_local_path = current_local_dir / name
 
             if child.is_dir():
@@ -194,7 +238,7 @@ def extract_iso_recursive(iso_path, iso_internal_folder, local_dest_root):
                 # Extraction for files
                 print(f"Extracting: {name}")
                 with open(child_local_path, 'wb') as f:
-                    iso.get_file_from_iso_fp(f, iso_path=child_iso_path)
+                    iso.get_file_from_iso_fp(f, iso_path=child_iso_path, blocksize=ISO_COPY_BLOCKSIZE)
 
     try:
         walk_and_extract(iso_dir, local_root)
@@ -204,14 +248,14 @@ def extract_iso_recursive(iso_path, iso_internal_folder, local_dest_root):
         iso.close()
 
 
-def check_updated_game_files(updater_files, path):
+def check_updated_game_files(updater_files, file_hashes):
     """
-    Does a final check of the md5sum in the game directory
+    Does a final check of the md5sum of the extracted updater files.
+    file_hashes comes from is3extract.extract_archive, so nothing is re-read.
     """
     print("Checking updater MD5sums ...")
     for key in updater_files.keys():
-        file_path = path / key
-        if calculate_md5(file_path) == updater_files.get(key):
+        if file_hashes.get(key) == updater_files.get(key):
             print(f"{key} - PASSED MD5 CHECK ✅")
         else:
             print(f"{key} - FAILED MD5 CHECK ❌")
@@ -314,13 +358,13 @@ def main():
     print("Extracting updater files ... ")
     # Here
     paths['update_dir'].mkdir(parents=True, exist_ok=True)
-    # read in updater
-    with open( paths['update_file'] ,'rb') as f:
-        data = f.read()
-
-    # Get all archives in IS3 file
-    archives = is3extract.find_is3_archives(data)
-    is3extract.extract_archive(data, archives[1], paths['update_dir'])
+    # map in updater read-only; the OS pages in only what the parser touches
+    update_hashes = {}
+    with open( paths['update_file'] ,'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # Get all archives in IS3 file
+        archives = is3extract.find_is3_archives(data)
+        is3extract.extract_archive(data, archives[1], paths['update_dir'], hashes=update_hashes)
 
     # Now we replace the updater files. Copy will use keys in dict
     # specify 2KNET folder
@@ -339,7 +383,7 @@ def main():
             print(f"Error: Source file {source} not found.")
 
     # now we check final md5sums
-    game_final_check = check_updated_game_files(updater_files, paths["game_dir"])
+    game_final_check = check_updated_game_files(updater_files, update_hashes)
 
     # bomb out if check failes
     if not game_final_check:
@@ -13,10 +13,20 @@ Usage:
         MAXHELP.EXE, WINSCURK.EXE
 """
 
+import contextlib
+import ctypes
 import hashlib
+import json
+import mmap
 import os
+import shutil
 import sys
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
 
 
 # =============================================================================
@@ -24,45 +34,155 @@ from pathlib import Path
 # =============================================================================
 
 def bsdiff_apply(old_data: bytes, new_size: int, triples: list,
-                 diff_mods: dict, extra: bytes) -> bytes:
+                 diff_mods: Union[Mapping[int, int], "Deltas"], extra: bytes,
+                 ctrl: Optional[array] = None) -> bytearray:
     """
     Apply a bsdiff-style patch to old_data, producing new_data of new_size.
 
-    This is a pure Python reimplementation of the bspatch algorithm.
-    Instead of storing the full diff block (mostly zeros), we store only
-    the non-zero delta entries in diff_mods.
+    This is a reimplementation of the bspatch algorithm. Instead of
+    storing the full diff block (mostly zeros), we store only the non-zero
+    delta entries in diff_mods.
 
     Args:
         old_data:  The original file bytes.
         new_size:  Expected size of the patched output.
         triples:   List of (add_len, copy_len, seek_offset) control tuples.
-        diff_mods: Dict mapping {diff_stream_position: delta_byte} for all
-                   non-zero entries in the diff block.
+        diff_mods: Mapping of {diff_stream_position: delta_byte} for all
+                   non-zero entries in the diff block, or the same entries
+                   precompiled by compile_deltas().
         extra:     Raw bytes for the extra/insertion block.
+        ctrl:      Optional triples precompiled by compile_ctrl(); must
+                   match triples (ValueError otherwise).
 
     Returns:
-        The patched file as bytes.
+        The patched file as a bytearray (hash it or write it directly;
+        no bytes copy is made).
+
+    Uses the native applier from bspatch.c when it has been built,
+    otherwise pure Python. Both produce identical output.
     """
     new_data = bytearray(new_size)
+    bsdiff_apply_into(old_data, new_data, triples, diff_mods, extra, ctrl)
+    return new_data
+
+
+def bsdiff_apply_into(old_data: bytes, new_data, triples: list,
+                      diff_mods: Union[Mapping[int, int], "Deltas"],
+                      extra: bytes, ctrl: Optional[array] = None) -> None:
+    """
+    bsdiff_apply() into new_data, a zero-filled writable buffer of new_size
+    bytes (bytearray, or an mmap of a freshly truncated output file), so
+    the patched file is built where it will be written.
+    """
+    new_size = len(new_data)
+    # Slice assignment would silently resize new_data, so reject control
+    # data that runs past new_size or the extra block up front
+    add_total = sum(add_len for add_len, _, _ in triples)
+    copy_total = sum(copy_len for _, copy_len, _ in triples)
+    if add_total + copy_total > new_size or copy_total > len(extra):
+        raise ValueError("patch triples exceed new_size or the extra block")
+    # The native applier runs from ctrl, so it must be the triples checked
+    # above and not, say, those of the entry a caller's dict was copied from
+    if ctrl is not None and ctrl != _ctrl_for(triples):
+        raise ValueError("ctrl does not match the patch triples")
+
+    deltas = compile_deltas(diff_mods)
+    if (add_total == new_size and is_overlay(triples)
+            and (not deltas.positions or deltas.positions[-1] < new_size)):
+        # No inserts or seeks: one copy of old plus the deltas in place
+        _overlay_apply_copy(old_data, new_data, deltas)
+    elif _native_bspatch is not None:
+        if ctrl is None:
+            ctrl = _ctrl_for(triples)
+        _bsdiff_apply_native(old_data, new_data, ctrl, deltas, extra)
+    else:
+        _bsdiff_apply_py(old_data, new_data, triples, deltas, extra)
+
+
+def _overlay_apply_copy(old_data, new_data, deltas):
+    """bsdiff_apply() for overlay patches (see is_overlay)."""
+    with memoryview(old_data) as old_view:
+        n = min(len(old_view), len(new_data))
+        new_data[:n] = old_view[:n]
+    overlay_apply(new_data, deltas)
+
+
+def _bsdiff_apply_native(old_data, new_data, ctrl, deltas, extra):
+    """Fill new_data via bspatch_apply() from the native library."""
+    if not isinstance(old_data, bytes):
+        try:
+            old_data = (ctypes.c_char * len(old_data)).from_buffer(old_data)
+        except TypeError:
+            old_data = bytes(old_data)  # read-only buffer such as an mmap
+    out = (ctypes.c_char * len(new_data)).from_buffer(new_data)
+
+    ret = _native_bspatch(
+        old_data, len(old_data), out, len(new_data),
+        _array_ptr(ctrl), len(ctrl) // 3,
+        _array_ptr(deltas.positions), deltas.values, len(deltas.values),
+        bytes(extra), len(extra))
+    del out  # release the buffer export
+    if ret != 0:
+        raise ValueError("patch triples exceed new_size or the extra block")
+
+
+def _array_ptr(arr):
+    """Address of an array.array's items, for passing to ctypes."""
+    return arr.buffer_info()[0] if len(arr) else None
+
+
+def _bsdiff_apply_py(old_data, new_data, triples, deltas, extra):
+    """Pure Python bspatch into the zeroed new_data."""
+    # Phase 1: lay down the base bytes. Slicing a memoryview copies nothing,
+    # so each block goes straight from old_data/extra into new_data.
+    old_view = memoryview(old_data)
+    extra_view = memoryview(extra)
+    old_size = len(old_view)
     old_pos = 0
     new_pos = 0
     diff_pos = 0
     extra_pos = 0
-
-    for add_len, copy_len, seek_offset in triples:
-        # Step 1: Copy add_len bytes from old, applying diff deltas
-        for i in range(add_len):
-            old_byte = old_data[old_pos + i] if (old_pos + i) < len(old_data) else 0
-            delta = diff_mods.get(diff_pos + i, 0)
-            new_data[new_pos + i] = (old_byte + delta) & 0xFF
-
-        diff_pos += add_len
-        new_pos += add_len
+    blocks = []  # (diff start, diff end, new_pos - diff_pos) per add block
+
+    n_triples = len(triples)
+    i = 0
+    while i < n_triples:
+        add_len, copy_len, seek_offset = triples[i]
+        i += 1
+
+        # An (n, 0, -n) triple seeks back over the window it just read, so a
+        # following triple with the same add_len reads it again. Fuse such a
+        # run (14 in a row in 2KSERVER.EXE) into one repeated copy.
+        repeat = 1
+        while (add_len and copy_len == 0 and seek_offset == -add_len
+               and i < n_triples and triples[i][0] == add_len):
+            _, copy_len, seek_offset = triples[i]
+            repeat += 1
+            i += 1
+        span = add_len * repeat
+
+        # Step 1: Copy add_len bytes from old in one slice (bytes outside
+        # old stay zero); the diff deltas are added in phase 2
+        old_start = max(old_pos, 0)
+        old_end = min(old_pos + add_len, old_size)
+        if repeat > 1:
+            window = bytearray(add_len)
+            if old_end > old_start:
+                window[old_start - old_pos:old_end - old_pos] = old_view[old_start:old_end]
+            new_data[new_pos:new_pos + span] = window * repeat
+        elif old_end > old_start:
+            at = new_pos + old_start - old_pos
+            new_data[at:at + old_end - old_start] = old_view[old_start:old_end]
+        if span:
+            blocks.append((diff_pos, diff_pos + span, new_pos - diff_pos))
+
+        diff_pos += span
+        new_pos += span
         old_pos += add_len
 
         # Step 2: Copy copy_len bytes from extra block (inserted data)
-        for i in range(copy_len):
-            new_data[new_pos + i] = extra[extra_pos + i]
+        if copy_len:
+            new_data[new_pos:new_pos + copy_len] = extra_view[extra_pos:extra_pos + copy_len]
 
         extra_pos += copy_len
         new_pos += copy_len
@@ -70,11 +190,249 @@ def bsdiff_apply(old_data: bytes, new_size: int, triples: list,
         # Step 3: Adjust old file position by seek offset
         old_pos += seek_offset
 
-    return bytes(new_data)
+    old_view.release()
+    extra_view.release()
+
+    # Phase 2: add the sparse diff regions in one forward merge with the
+    # (contiguous, sorted) add blocks. A region can straddle two blocks,
+    # so it is clipped to each block it overlaps.
+    add = add_bytes
+    n_blocks = len(blocks)
+    b = 0
+    for start, region in zip(deltas.region_starts, deltas.region_data):
+        end = start + len(region)
+        while b < n_blocks and blocks[b][1] <= start:
+            b += 1
+        j = b
+        while j < n_blocks and blocks[j][0] < end:
+            block_start, block_end, shift = blocks[j]
+            lo = max(start, block_start)
+            hi = min(end, block_end)
+            if hi - lo == 1:
+                new_data[lo + shift] = (new_data[lo + shift] + region[lo - start]) & 0xFF
+            else:
+                new_data[lo + shift:hi + shift] = add(
+                    new_data[lo + shift:hi + shift], region[lo - start:hi - start])
+            j += 1
+
+
+def _load_native_bspatch():
+    """Load the compiled applier from bspatch.c if present, else return None."""
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    for name in ("_bspatch.so", "_bspatch.dll", "_bspatch.dylib"):
+        path = os.path.join(here, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            lib = ctypes.CDLL(path)
+            func = lib.bspatch_apply
+        except (OSError, AttributeError):
+            # Not loadable, or built without the exported symbol
+            return None
+        func.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
+                         ctypes.c_void_p, ctypes.c_size_t,
+                         ctypes.c_void_p, ctypes.c_size_t,
+                         ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t,
+                         ctypes.c_char_p, ctypes.c_size_t]
+        func.restype = ctypes.c_int
+        return func
+
+    return None
+
+
+_native_bspatch = _load_native_bspatch()
+
+
+def add_bytes(a: bytes, b: bytes) -> bytes:
+    """
+    Bytewise (a[i] + b[i]) & 0xFF of two equal-length buffers.
+
+    Both buffers are treated as one little-endian integer each and added
+    SWAR-style: the low 7 bits of every byte are summed (the carry out of
+    bit 7 cannot reach the next byte), then bit 7 is fixed up with XOR.
+    The whole run is done in a few big-integer operations instead of a
+    Python loop per byte.
+    """
+    n = len(b)
+    x = int.from_bytes(a, "little")
+    y = int.from_bytes(b, "little")
+    low7 = int.from_bytes(b"\x7f" * n, "little")
+    high = int.from_bytes(b"\x80" * n, "little")
+    return (((x & low7) + (y & low7)) ^ ((x ^ y) & high)).to_bytes(n, "little")
+
+
+# diff_mods as parallel arrays: positions (sorted array of ints) and the
+# delta byte for each position, plus the same deltas run-length grouped into
+# contiguous regions: region_starts (sorted array of ints) and region_data
+# (a bytes object of deltas per region)
+Deltas = namedtuple("Deltas", "positions values region_starts region_data")
+
+# Largest run of zero deltas kept inside a region rather than splitting it
+REGION_MAX_GAP = 1
+
+
+def compile_deltas(diff_mods) -> Deltas:
+    """
+    Convert a diff_mods dict to sorted parallel position/value arrays and
+    contiguous delta regions. Already compiled Deltas are returned
+    unchanged.
+    """
+    if isinstance(diff_mods, Deltas):
+        return diff_mods
+    items = sorted(diff_mods.items())
+
+    region_starts = array("q")
+    region_data = []
+    region_end = 0  # one past the last position in region_data[-1]
+    for pos, delta in items:
+        if region_data and pos - region_end <= REGION_MAX_GAP:
+            region_data[-1].extend(bytes(pos - region_end))
+        else:
+            region_starts.append(pos)
+            region_data.append(bytearray())
+        region_data[-1].append(delta)
+        region_end = pos + 1
+
+    return Deltas(array("q", [pos for pos, _ in items]),
+                  bytes(delta for _, delta in items),
+                  region_starts,
+                  tuple(bytes(data) for data in region_data))
+
+
+def compile_ctrl(triples: list) -> array:
+    """
+    Flatten (add_len, copy_len, seek_offset) triples into one array of
+    64-bit ints, the control layout bspatch_apply() reads.
+    """
+    return array("q", [value for triple in triples for value in triple])
+
+
+def _ctrl_for(triples) -> array:
+    """compile_ctrl(triples), precompiled at import for PATCHES triples."""
+    hit = _PATCH_CTRL.get(id(triples))
+    if hit is not None and hit[0] is triples:
+        return hit[1]
+    return compile_ctrl(triples)
+
+
+def is_overlay(triples: list) -> bool:
+    """
+    True if a patch only changes bytes in place: no extra-block inserts and
+    no seeks, so new file position == old file position == diff position.
+    The seek of the last triple is never used and may be anything.
+    """
+    return all(copy_len == 0 for _, copy_len, _ in triples) and \
+        all(seek_offset == 0 for _, _, seek_offset in triples[:-1])
+
+
+def overlay_apply(data, diff_mods) -> None:
+    """
+    Apply an in-place patch (see is_overlay) directly to data, a writable
+    buffer (bytearray or mmap) that is already new_size bytes long.
+
+    Only the delta regions are touched, one slice per region, so for a file
+    mapped with mmap just the pages holding them are dirtied. All diff_mods
+    positions must be below len(data) (checked for PATCHES at import).
+    """
+    deltas = compile_deltas(diff_mods)
+    for start, region in zip(deltas.region_starts, deltas.region_data):
+        end = start + len(region)
+        data[start:end] = add_bytes(data[start:end], region)
+
+
+def overlay_md5(data, diff_mods) -> str:
+    """
+    MD5 that data would have after overlay_apply(), computed without
+    modifying or copying it.
+    """
+    h = _new_md5()
+    update = h.update
+    with memoryview(data) as view:
+        prev = 0
+        deltas = compile_deltas(diff_mods)
+        for start, region in zip(deltas.region_starts, deltas.region_data):
+            end = start + len(region)
+            update(view[prev:start])
+            update(add_bytes(view[start:end], region))
+            prev = end
+        update(view[prev:])
+    return h.hexdigest().upper()
+
+
+def _new_md5():
+    """
+    New MD5 object. MD5 is only used here as a file checksum, so flag it
+    as not security related: this keeps it working on FIPS-restricted
+    OpenSSL builds, which refuse a plain hashlib.md5().
+    """
+    return hashlib.md5(usedforsecurity=False)
 
 
 def md5(data: bytes) -> str:
-    return hashlib.md5(data).hexdigest().upper()
+    """MD5 of an in-memory buffer (bytes, bytearray, memoryview or mmap)."""
+    h = _new_md5()
+    h.update(data)
+    return h.hexdigest().upper()
+
+
+def file_md5(filepath: Path) -> str:
+    """MD5 of a file, streamed rather than read into memory first."""
+    # file_digest runs the read/update loop in C with a large buffer.
+    # Unbuffered open lets it readinto() straight from the OS.
+    with open(filepath, "rb", buffering=0) as f:
+        _advise_sequential(f)
+        return hashlib.file_digest(f, _new_md5).hexdigest().upper()
+
+
+def _advise_sequential(f, mapping=None):
+    """
+    Hint to the OS that open file f (and its mmap, if given) will be read
+    front to back, so it reads ahead more aggressively. A no-op where the
+    platform has no such hint.
+    """
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    if mapping is not None and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+
+
+def _md5_cache_path(filepath: Path) -> Path:
+    return filepath.with_suffix(filepath.suffix + ".md5cache")
+
+
+def read_md5_cache(filepath: Path):
+    """
+    Return the MD5 recorded in filepath's .md5cache sidecar, or None.
+
+    The sidecar is only trusted while the file's size and mtime still
+    match the values stored alongside the hash, and only to skip files
+    that are already patched; verify_all() always re-reads the file.
+    """
+    try:
+        st = filepath.stat()
+        cache = json.loads(_md5_cache_path(filepath).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict):
+        return None
+    if cache.get("size") != st.st_size or cache.get("mtime") != st.st_mtime_ns:
+        return None
+    return cache.get("md5")
+
+
+def write_md5_cache(filepath: Path, file_hash: str, st=None):
+    """
+    Record file_hash for filepath's size and mtime: those in st (an
+    os.stat_result taken before hashing), else the current ones.
+    """
+    try:
+        if st is None:
+            st = filepath.stat()
+        _md5_cache_path(filepath).write_text(json.dumps(
+            {"mtime": st.st_mtime_ns, "size": st.st_size, "md5": file_hash}))
+    except OSError:
+        pass
 
 
 # =============================================================================
@@ -711,7 +1069,12 @@ TWOKCLIENT_EXE = {
 # PATCH REGISTRY
 # =============================================================================
 
-PATCHES = {
+# Keys every PATCHES entry must define, exactly; a missing or misspelt key
+# is caught at import rather than when that file is patched
+PATCH_KEYS = frozenset(
+    ("new_size", "triples", "diff_mods", "extra", "pre_md5", "post_md5"))
+
+_PATCH_TABLES = {
     "WINSCURK.EXE": WINSCURK_EXE,
     "2KCLIENT.EXE": TWOKCLIENT_EXE,
     "2KSERVER.EXE": TWOKSERVER_EXE,
@@ -720,19 +1083,76 @@ PATCHES = {
     "MAXHELP.EXE":  MAXHELP_EXE,
 }
 
+# Check the static tables here, before anything is derived from them, so
+# the apply paths need no bounds checks
+for _name, _patch in _PATCH_TABLES.items():
+    assert _patch.keys() == PATCH_KEYS, _name
+    assert all(len(_patch[key]) == 32 and _patch[key] == _patch[key].upper()
+               for key in ("pre_md5", "post_md5")), _name
+    _add_total = sum(add_len for add_len, _, _ in _patch["triples"])
+    _copy_total = sum(copy_len for _, copy_len, _ in _patch["triples"])
+    assert _add_total + _copy_total == _patch["new_size"], _name
+    assert _copy_total == len(_patch["extra"]), _name
+    assert all(0 <= pos < _add_total for pos in _patch["diff_mods"]), _name
+    assert 0 not in _patch["diff_mods"].values(), _name
+del _name, _patch, _add_total, _copy_total
+
+# Read-only view: file names (uppercase) to read-only patch definitions.
+# The triples become a tuple and diff_mods a read-only view of a copy, so
+# nothing reachable from PATCHES can be changed.
+PATCHES = MappingProxyType({
+    name: MappingProxyType(dict(
+        patch,
+        triples=tuple(patch["triples"]),
+        diff_mods=MappingProxyType(dict(patch["diff_mods"])),
+    ))
+    for name, patch in _PATCH_TABLES.items()
+})
+
+# Data derived from a patch definition: its compiled deltas and whether it
+# is an overlay patch (see is_overlay)
+_Compiled = namedtuple("_Compiled", "deltas overlay")
+
+
+def _compile_patch(patch_data) -> _Compiled:
+    return _Compiled(compile_deltas(patch_data["diff_mods"]),
+                     is_overlay(patch_data["triples"]))
+
+
+# Sort each patch's diff_mods and flatten its triples once at import rather
+# than on every apply. Both are kept apart from the PATCHES entries: _COMPILED
+# by patch name, and the control arrays by the identity of the (immutable)
+# triples tuple they were built from, see _ctrl_for().
+_COMPILED = MappingProxyType(
+    {name: _compile_patch(patch) for name, patch in PATCHES.items()})
+_PATCH_CTRL = MappingProxyType(
+    {id(patch["triples"]): (patch["triples"], compile_ctrl(patch["triples"]))
+     for patch in PATCHES.values()})
+
+
+def _compiled_for(patch_data) -> _Compiled:
+    """Precompiled data for a PATCHES entry; computed now for anything else."""
+    for name, patch in PATCHES.items():
+        if patch is patch_data:
+            return _COMPILED[name]
+    return _compile_patch(patch_data)
+
 
 # =============================================================================
 # PATCHING FUNCTIONS
 # =============================================================================
 
-def patch_file(filepath: str, patch_data: dict, backup: bool = True) -> bool:
+def patch_file(filepath: str, patch_data: dict, backup: bool = True,
+               log=print) -> bool:
     """
     Apply a patch to a single file.
 
     Args:
         filepath:   Path to the file to patch.
-        patch_data: Patch definition dict from PATCHES.
+        patch_data: Patch definition from PATCHES, or a dict with the same
+                    keys (see PATCH_KEYS).
         backup:     If True, rename original to .old before writing.
+        log:        Called with each status line (default: print).
 
     Returns:
         True if patch was applied successfully.
@@ -740,46 +1160,140 @@ def patch_file(filepath: str, patch_data: dict, backup: bool = True) -> bool:
     filepath = Path(filepath)
 
     if not filepath.exists():
-        print(f"  ERROR: File not found: {filepath}")
+        log(f"  ERROR: File not found: {filepath}")
         return False
 
-    old_data = filepath.read_bytes()
-    old_hash = md5(old_data)
-
-    if old_hash == patch_data["post_md5"]:
-        print(f"  SKIP: {filepath.name} is already patched")
+    new_size = patch_data["new_size"]
+    st = filepath.stat()
+    file_size = st.st_size
+    size_matches = file_size == new_size
+    if size_matches and read_md5_cache(filepath) == patch_data["post_md5"]:
+        log(f"  SKIP: {filepath.name} is already patched")
         return True
 
-    if old_hash != patch_data["pre_md5"]:
-        print(f"  WARNING: {filepath.name} MD5 mismatch")
-        print(f"    Expected: {patch_data['pre_md5']}")
-        print(f"    Got:      {old_hash}")
-        print(f"    Attempting patch anyway...")
-
-    new_data = bsdiff_apply(
-        old_data,
-        patch_data["new_size"],
-        patch_data["triples"],
-        patch_data["diff_mods"],
-        patch_data["extra"],
-    )
-
-    new_hash = md5(new_data)
-    if new_hash != patch_data["post_md5"]:
-        print(f"  ERROR: Post-patch MD5 verification failed for {filepath.name}")
-        print(f"    Expected: {patch_data['post_md5']}")
-        print(f"    Got:      {new_hash}")
-        return False
-
-    if backup:
-        backup_path = filepath.with_suffix(filepath.suffix + ".old")
-        if not backup_path.exists():
-            filepath.rename(backup_path)
+    compiled = _compiled_for(patch_data)
+    deltas = compiled.deltas
+    # Overlay patches of a correctly sized file go through a writable
+    # mapping: nothing is read up front and only the pages holding changed
+    # bytes are dirtied and written back
+    overlay = compiled.overlay
+    # A read-only file (as copied from CD media) is rebuilt through the
+    # temporary file instead, which only needs the directory writable
+    in_place = (size_matches and new_size > 0 and overlay
+                and os.access(filepath, os.W_OK))
+
+    with contextlib.ExitStack() as stack:
+        # A file of new_size may already be patched, so stream-hash it
+        # read-only first: that case then builds no patch, and an already
+        # patched (or read-only) file is never opened for writing
+        old_hash = file_md5(filepath) if size_matches else None
+        if old_hash == patch_data["post_md5"]:
+            write_md5_cache(filepath, old_hash, st)
+            log(f"  SKIP: {filepath.name} is already patched")
+            return True
+
+        if in_place:
+            try:
+                f = stack.enter_context(open(filepath, "r+b"))
+                old_data = stack.enter_context(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE))
+            except PermissionError:
+                # os.access() can be wrong (ACLs, read-only mounts)
+                stack.close()
+                in_place = False
+        if not in_place:
+            # Build the new file directly in a mapping of <name>.tmp (a
+            # truncated file reads as zeros), so a crash never leaves a
+            # partial file (or none) under the real name. It is moved into
+            # place at the end; on any failure it is removed again.
+            tmp_path = filepath.with_suffix(filepath.suffix + ".tmp")
+            stack.callback(tmp_path.unlink, missing_ok=True)
+
+            # Map the input copy-on-write instead of reading it into memory;
+            # the mapping is private but writable, as ctypes needs for the
+            # native applier. Both mappings are closed again before any
+            # file is renamed.
+            with open(filepath, "rb") as f, \
+                    (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+                     if file_size else contextlib.nullcontext(b"")) as old_data, \
+                    open(tmp_path, "w+b") as out:
+                # bsdiff reads old_data mostly forwards (seeks are short)
+                if file_size:
+                    _advise_sequential(f, old_data)
+                out.truncate(new_size)
+                with (mmap.mmap(out.fileno(), 0) if new_size
+                      else contextlib.nullcontext(bytearray())) as new_data:
+                    # bsdiff_apply_into() only reads old_data, so a hash not
+                    # taken above is computed on a worker thread (hashlib
+                    # releases the GIL) while the patch is built
+                    with ThreadPoolExecutor(max_workers=1) as pool:
+                        pending_hash = (pool.submit(md5, old_data)
+                                        if old_hash is None else None)
+                        bsdiff_apply_into(
+                            old_data,
+                            new_data,
+                            patch_data["triples"],
+                            deltas,
+                            patch_data["extra"],
+                        )
+                        if pending_hash is not None:
+                            old_hash = pending_hash.result()
+                    # Output of an unexpected input must be verified below;
+                    # hash it now, straight from the still-mapped pages,
+                    # rather than reading the file back
+                    if old_hash != patch_data["pre_md5"]:
+                        out_hash = md5(new_data)
+                    if new_size:
+                        new_data.flush()
+                os.fsync(out.fileno())
+
+        # The patch is deterministic: the known input always produces the
+        # known output, so only an unexpected input needs its output hashed.
+        # Only a hash of the bytes actually written goes in the sidecar,
+        # which later runs trust as proof that the file is patched.
+        written_hash = None
+        if old_hash != patch_data["pre_md5"]:
+            log(f"  WARNING: {filepath.name} MD5 mismatch")
+            log(f"    Expected: {patch_data['pre_md5']}")
+            log(f"    Got:      {old_hash}")
+            log(f"    Attempting patch anyway...")
+
+            # Verify before the original file is touched. For in-place
+            # patches this is a prediction from the unmodified bytes.
+            new_hash = overlay_md5(old_data, deltas) if in_place else out_hash
+            if not in_place:
+                written_hash = out_hash
+            if new_hash != patch_data["post_md5"]:
+                log(f"  ERROR: Post-patch MD5 verification failed for {filepath.name}")
+                log(f"    Expected: {patch_data['post_md5']}")
+                log(f"    Got:      {new_hash}")
+                return False
+
+        # In-place patches keep the file, so the backup is a (kernel-side)
+        # copy rather than a rename
+        if backup:
+            backup_path = filepath.with_suffix(filepath.suffix + ".old")
+            if not backup_path.exists():
+                if in_place:
+                    shutil.copy2(filepath, backup_path)
+                else:
+                    os.replace(filepath, backup_path)
+
+        if in_place:
+            overlay_apply(old_data, deltas)
+            old_data.flush()
         else:
-            filepath.unlink()
+            os.replace(tmp_path, filepath)
 
-    filepath.write_bytes(new_data)
-    print(f"  OK: {filepath.name} patched successfully")
+    # Writes through a mapping may update mtime lazily; set it now so the
+    # sidecar (or any stale one) sees the final value
+    os.utime(filepath)
+    if written_hash is not None:
+        write_md5_cache(filepath, written_hash)
+    else:
+        # Unmeasured: leave the next run or verify_all() to hash the file
+        _md5_cache_path(filepath).unlink(missing_ok=True)
+    log(f"  OK: {filepath.name} patched successfully")
     return True
 
 
@@ -802,13 +1316,27 @@ def patch_all(game_dir: str) -> bool:
     print(f"Target directory: {game_path}")
     print()
 
+    def run(item):
+        filename, patch_data = item
+        lines = []
+        # An error in one file must not lose the other files' reports
+        try:
+            ok = patch_file(game_path / filename, patch_data, log=lines.append)
+        except Exception as e:
+            lines.append(f"  FAILED: {filename} ({type(e).__name__}: {e})")
+            ok = False
+        return filename, ok, lines
+
+    # The files are independent and hashlib releases the GIL, so patch them
+    # concurrently; each file's output is collected and printed in order
     all_ok = True
-    for filename, patch_data in PATCHES.items():
-        filepath = game_path / filename
-        print(f"Patching {filename}...")
-        if not patch_file(filepath, patch_data):
-            all_ok = False
-        print()
+    workers = min(len(PATCHES), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for filename, ok, lines in pool.map(run, PATCHES.items()):
+            # One write per file rather than one per status line
+            print("\n".join([f"Patching {filename}...", *lines, ""]))
+            if not ok:
+                all_ok = False
 
     if all_ok:
         print("All patches applied successfully.")
@@ -818,31 +1346,45 @@ def patch_all(game_dir: str) -> bool:
     return all_ok
 
 
-def verify_all(game_dir: str) -> bool:
+def verify_all(game_dir: str, update_cache: bool = False) -> bool:
     """
     Verify all files match their expected post-patch MD5 checksums.
+
+    Nothing in game_dir is changed unless update_cache is set, in which
+    case the .md5cache sidecar is refreshed for each file found patched.
     """
     game_path = Path(game_dir)
-    all_ok = True
 
-    print("Verifying patched files...")
-    for filename, patch_data in PATCHES.items():
+    def check(item):
+        filename, patch_data = item
         filepath = game_path / filename
         if not filepath.exists():
-            print(f"  MISSING: {filename}")
-            all_ok = False
-            continue
+            return f"  MISSING: {filename}", False
+
+        # Always hash the actual bytes, never trusting the sidecar. A
+        # refreshed sidecar records the stat taken before hashing, so a
+        # change made meanwhile leaves it stale rather than wrong.
+        st = filepath.stat()
+        file_hash = file_md5(filepath)
 
-        file_hash = md5(filepath.read_bytes())
         if file_hash == patch_data["post_md5"]:
-            print(f"  OK: {filename}")
+            if update_cache:
+                write_md5_cache(filepath, file_hash, st)
+            return f"  OK: {filename}", True
         elif file_hash == patch_data["pre_md5"]:
-            print(f"  UNPATCHED: {filename}")
-            all_ok = False
+            return f"  UNPATCHED: {filename}", False
         else:
-            print(f"  UNKNOWN: {filename} (MD5: {file_hash})")
-            all_ok = False
+            return f"  UNKNOWN: {filename} (MD5: {file_hash})", False
+
+    # Hash the files concurrently (hashlib releases the GIL), then print the
+    # report in file order in one write at the end
+    workers = min(len(PATCHES), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(check, PATCHES.items()))
+    lines = ["Verifying patched files...", *(line for line, _ in results)]
+    all_ok = all(ok for _, ok in results)
 
+    print("\n".join(lines))
     return all_ok
 
 
@@ -856,13 +1398,14 @@ def main():
         print("Commands:")
         print("  python sc2knet_patcher.py <game_dir>          Apply all patches")
         print("  python sc2knet_patcher.py <game_dir> --verify  Verify patch status")
+        print("      add --update-cache to record the hashes of patched files")
         print("  python sc2knet_patcher.py <game_dir> <file>    Patch single file")
         sys.exit(1)
 
     game_dir = sys.argv[1]
 
     if len(sys.argv) >= 3 and sys.argv[2] == "--verify":
-        ok = verify_all(game_dir)
+        ok = verify_all(game_dir, update_cache="--update-cache" in sys.argv[3:])
         sys.exit(0 if ok else 1)
 
     if len(sys.argv) >= 3 and sys.argv[2] != "--verify":
@@ -0,0 +1,114 @@
+"""Tests for sc2knet_patcher. Run with: python -m unittest discover tests"""
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import sc2knet_patcher  # noqa: E402
+
+
+class CompileDeltasTest(unittest.TestCase):
+    def test_region_gap_merging(self):
+        gap = sc2knet_patcher.REGION_MAX_GAP
+        # A run of REGION_MAX_GAP zero deltas stays inside one region...
+        at = 10 + 1 + gap
+        deltas = sc2knet_patcher.compile_deltas({10: 1, at: 2})
+        self.assertEqual(list(deltas.region_starts), [10])
+        self.assertEqual(deltas.region_data, (b"\x01" + bytes(gap) + b"\x02",))
+        # ...one zero delta more splits it in two
+        at = 10 + 1 + gap + 1
+        deltas = sc2knet_patcher.compile_deltas({at: 2, 10: 1})
+        self.assertEqual(list(deltas.region_starts), [10, at])
+        self.assertEqual(deltas.region_data, (b"\x01", b"\x02"))
+        self.assertEqual(list(deltas.positions), [10, at])
+        self.assertEqual(deltas.values, b"\x01\x02")
+
+
+class PatchFileTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def make_target(self, name):
+        """Write a random input for PATCHES[name] and return its patch."""
+        patch = sc2knet_patcher.PATCHES[name]
+        old = os.urandom(patch["new_size"])
+        new = sc2knet_patcher.bsdiff_apply(
+            old, patch["new_size"], patch["triples"], patch["diff_mods"],
+            patch["extra"])
+        (self.dir / name).write_bytes(old)
+        patch = dict(patch, pre_md5=sc2knet_patcher.md5(old),
+                     post_md5=sc2knet_patcher.md5(new))
+        return patch, old, bytes(new)
+
+    def assert_rebuilt(self, name, old, new, replace):
+        """Check target name was rebuilt through <name>.tmp, not in place."""
+        target = self.dir / name
+        tmp = self.dir / (name + ".tmp")
+        replace.assert_any_call(tmp, target)
+        self.assertEqual(target.read_bytes(), new)
+        self.assertEqual((self.dir / (name + ".old")).read_bytes(), old)
+        self.assertFalse(tmp.exists())
+
+    def test_unwritable_overlay_target(self):
+        # Also runs as root: os.access() reporting the file unwritable must
+        # send it down the temporary file path
+        patch, old, new = self.make_target("WINSCURK.EXE")
+        target = self.dir / "WINSCURK.EXE"
+        real_access = os.access
+
+        def access(path, mode, *args, **kwargs):
+            if Path(path) == target and mode & os.W_OK:
+                return False
+            return real_access(path, mode, *args, **kwargs)
+
+        with mock.patch.object(sc2knet_patcher.os, "access", access), \
+                mock.patch.object(sc2knet_patcher.os, "replace",
+                                  wraps=os.replace) as replace:
+            self.assertTrue(sc2knet_patcher.patch_file(target, patch,
+                                                       log=lambda line: None))
+        self.assert_rebuilt("WINSCURK.EXE", old, new, replace)
+
+    def test_in_place_open_denied(self):
+        # os.access() can be wrong (ACLs, read-only mounts): a
+        # PermissionError from the in-place open must also fall back
+        patch, old, new = self.make_target("WINSCURK.EXE")
+        target = self.dir / "WINSCURK.EXE"
+
+        def fake_open(file, mode="r", *args, **kwargs):
+            if Path(file) == target and mode == "r+b":
+                raise PermissionError(13, "Permission denied", str(file))
+            return open(file, mode, *args, **kwargs)
+
+        with mock.patch("sc2knet_patcher.open", fake_open, create=True), \
+                mock.patch.object(sc2knet_patcher.os, "replace",
+                                  wraps=os.replace) as replace:
+            self.assertTrue(sc2knet_patcher.patch_file(target, patch,
+                                                       log=lambda line: None))
+        self.assert_rebuilt("WINSCURK.EXE", old, new, replace)
+
+    @unittest.skipIf(hasattr(os, "geteuid") and os.geteuid() == 0,
+                     "root can write read-only files")
+    def test_read_only_overlay_target(self):
+        # An overlay patch of a correctly sized file is normally applied in
+        # place; a read-only file must be rebuilt instead of failing
+        patch, old, new = self.make_target("WINSCURK.EXE")
+        target = self.dir / "WINSCURK.EXE"
+        target.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+        lines = []
+        self.assertTrue(sc2knet_patcher.patch_file(target, patch, log=lines.append),
+                        lines)
+        self.assertEqual(target.read_bytes(), new)
+        self.assertEqual((self.dir / "WINSCURK.EXE.old").read_bytes(), old)
+        self.assertFalse((self.dir / "WINSCURK.EXE.tmp").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()